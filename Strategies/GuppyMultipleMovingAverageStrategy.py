@@ -1,4 +1,5 @@
 import backtrader as bt
+from indicators import MovingAverageRibbon
 
 class GuppyMultipleMovingAverageStrategy(bt.Strategy):
     params = (
@@ -7,12 +8,13 @@ class GuppyMultipleMovingAverageStrategy(bt.Strategy):
     )
 
     def __init__(self):
-        self.fast_emas = [bt.indicators.EMA(self.data.close, period=period) for period in self.p.fast_periods]
-        self.slow_emas = [bt.indicators.EMA(self.data.close, period=period) for period in self.p.slow_periods]
+        # Each ribbon computes all of its EMAs and their ordering in one array pass
+        self.fast_ribbon = MovingAverageRibbon(self.data.close, periods=self.p.fast_periods, kind='ema')
+        self.slow_ribbon = MovingAverageRibbon(self.data.close, periods=self.p.slow_periods, kind='ema')
         
         # Crossover indicators
-        self.fast_cross = bt.indicators.CrossOver(self.fast_emas[0], self.fast_emas[-1])
-        self.slow_cross = bt.indicators.CrossOver(self.slow_emas[0], self.slow_emas[-1])
+        self.fast_cross = bt.indicators.CrossOver(self.fast_ribbon.shortest, self.fast_ribbon.longest)
+        self.slow_cross = bt.indicators.CrossOver(self.slow_ribbon.shortest, self.slow_ribbon.longest)
         
         self.order_count = 0
         self.signal = 0
@@ -24,10 +26,10 @@ class GuppyMultipleMovingAverageStrategy(bt.Strategy):
         print(f'{dt.isoformat()} {txt}')
 
     def next(self):
-        fast_bullish = all(ema1 > ema2 for ema1, ema2 in zip(self.fast_emas[:-1], self.fast_emas[1:]))
-        fast_bearish = all(ema1 < ema2 for ema1, ema2 in zip(self.fast_emas[:-1], self.fast_emas[1:]))
-        slow_bullish = all(ema1 > ema2 for ema1, ema2 in zip(self.slow_emas[:-1], self.slow_emas[1:]))
-        slow_bearish = all(ema1 < ema2 for ema1, ema2 in zip(self.slow_emas[:-1], self.slow_emas[1:]))
+        fast_bullish = self.fast_ribbon.bullish[0]
+        fast_bearish = self.fast_ribbon.bearish[0]
+        slow_bullish = self.slow_ribbon.bullish[0]
+        slow_bearish = self.slow_ribbon.bearish[0]
 
         if not self.position:
             if fast_bullish and slow_bullish and self.fast_cross > 0:
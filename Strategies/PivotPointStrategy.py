@@ -1,8 +1,11 @@
 import backtrader as bt
 
 class PivotPointStrategy(bt.Strategy):
+    # Pivots come from the last completed monthly bar and are traded on the daily bars
+    timeframes = ('monthly',)
+
     def __init__(self):
-        self.pivot = bt.indicators.PivotPoint(self.data)
+        self.pivot = bt.indicators.PivotPoint(self.getdatabyname('monthly'))
         self.order_count = 0
         self.signal = None
 
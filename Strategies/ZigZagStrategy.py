@@ -41,6 +41,8 @@ class ZigZag(bt.Indicator):
 
 class ZigZagStrategy(bt.Strategy):
     params = (('depth', 5), ('deviation', 3))
+    # ZigZag outputs 0 for its first `depth` bars without declaring a minimum period to backtrader
+    minperiod = dict(params)['depth'] + 1
 
     def __init__(self):
         self.zigzag = ZigZag(self.data, depth=self.p.depth, deviation=self.p.deviation)
@@ -0,0 +1,50 @@
+import os
+import importlib
+import inspect
+import backtrader as bt
+from metrics import EquityCurve
+from charts import ChartData
+from timeframes import higher_feed
+
+# Define folder paths
+STRATEGIES_PATH = './Strategies'
+
+def load_strategies():
+    strategies = {}
+    for filename in os.listdir(STRATEGIES_PATH):
+        if filename.endswith('.py') and filename != '__init__.py':
+            module_name = filename[:-3]  # Remove '.py'
+            module = importlib.import_module(f'Strategies.{module_name}')
+            for name, obj in inspect.getmembers(module):
+                if inspect.isclass(obj) and issubclass(obj, bt.Strategy) and obj != bt.Strategy:
+                    strategies[name] = obj
+    return strategies
+
+def run_backtest(data, strategy_class, start_cash=10000.0, commission=0.001, warmup=0, extra_datas=()):
+    cerebro = bt.Cerebro()
+    cerebro.adddata(data)
+    for extra in extra_datas:
+        cerebro.adddata(extra)
+    cerebro.addstrategy(strategy_class)
+    cerebro.broker.setcash(start_cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.addanalyzer(EquityCurve, _name='equity')
+    cerebro.addanalyzer(ChartData, _name='chart', warmup=warmup)
+    strategies = cerebro.run(runonce=False)
+    final_value = cerebro.broker.getvalue()
+    strategy = strategies[0]
+    trade_count = strategy.order_count if hasattr(strategy, 'order_count') else 0
+    current_signal = strategy.signal if hasattr(strategy, 'signal') else None
+    roi = strategy.roi if hasattr(strategy, 'roi') else ((final_value / start_cash) - 1.0)
+    curve = strategy.analyzers.equity.get_analysis()
+    chart = strategy.analyzers.chart.get_analysis()
+    if warmup:
+        # Drop the warm-up bars so curves cover only the requested window; ChartData does the same
+        curve = dict(curve, equity=curve['equity'][warmup:], exposure=curve['exposure'][warmup:])
+    return final_value, trade_count, current_signal, roi, curve, chart
+
+def run_job(df, strategy_class, start_cash=10000.0, commission=0.001, warmup=0, higher=None):
+    # Picklable entry point for the scheduler's worker processes. `higher` maps timeframe names
+    # to resampled bars, added as extra datas in the order the strategy declared them.
+    extra_datas = [higher_feed(bars, timeframe) for timeframe, bars in (higher or {}).items()]
+    return run_backtest(bt.feeds.PandasData(dataname=df), strategy_class, start_cash, commission, warmup, extra_datas)
@@ -0,0 +1,107 @@
+import backtrader as bt
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+MAX_POINTS = 2000
+
+
+class ChartData(bt.Analyzer):
+    # Records executed orders and the price-scale indicator lines of a run, so a chart can be
+    # drawn later without re-running the backtest. Lines are stored already bucketed to about
+    # `max_points` points and markers thinned to one buy and one sell per bucket, so a run's
+    # chart data stays small however long the run. The first `warmup` bars are left out.
+    params = (('warmup', 0), ('max_points', MAX_POINTS))
+
+    def start(self):
+        self.markers = []
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            self.markers.append((len(self.strategy) - 1, order.executed.price, order.isbuy()))
+
+    def stop(self):
+        self.overlays = {}
+        n = len(self.strategy) - self.p.warmup
+        for ind in self.strategy.getindicators():
+            # Only indicators backtrader itself would draw on top of the price; line
+            # operations such as `sma - ema` carry no plot info and are skipped
+            plotinfo = getattr(ind, 'plotinfo', None)
+            if plotinfo is None or plotinfo.subplot:
+                continue
+            for line_name in ind.lines.getlinealiases():
+                # Lines marked `_plotskip` (e.g. 0/1 flags) are left off, as backtrader's plotter does
+                lineplotinfo = getattr(ind.plotlines, line_name, None)
+                if lineplotinfo is not None and lineplotinfo._get('_plotskip', False):
+                    continue
+                values = np.asarray(getattr(ind.lines, line_name).array[-n:], dtype=np.float32)
+                if len(values) == n:
+                    self.overlays[f'{ind.plotlabel()} {line_name}'] = bucketed(values, self.p.max_points)
+
+    def get_analysis(self):
+        markers = np.array(self.markers, dtype=np.float64).reshape(-1, 3)
+        bars = markers[:, 0].astype(np.int64) - self.p.warmup
+        markers = markers[bars >= 0]
+        bars = bars[bars >= 0]
+        # One buy and one sell per bucket are enough to see where the trades are
+        size = _bucket_size(len(self.strategy) - self.p.warmup, self.p.max_points)
+        _, keep = np.unique(np.column_stack([bars // size, markers[:, 2]]), axis=0, return_index=True)
+        keep.sort()
+        return {
+            'overlays': self.overlays,
+            'marker_bars': bars[keep],
+            'marker_prices': markers[keep, 1],
+            'marker_is_buy': markers[keep, 2].astype(bool),
+        }
+
+
+def _bucket_size(n, max_points):
+    return max(-(-n // (max_points // 2)), 1) if n > max_points else 1
+
+
+def minmax_downsample(values, max_points=MAX_POINTS):
+    # Keeps the min and max of each bucket, so peaks and troughs survive downsampling.
+    # Returns the indices of the points to keep.
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    n_buckets = max_points // 2
+    size = _bucket_size(n, max_points)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(n_buckets, size)
+    filled = ~np.isnan(buckets).all(axis=1)
+    offsets = np.arange(n_buckets)[filled] * size
+    lows = np.nanargmin(buckets[filled], axis=1) + offsets
+    highs = np.nanargmax(buckets[filled], axis=1) + offsets
+    # Always keep the endpoints so the line spans the full period
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def bucketed(values, max_points=MAX_POINTS):
+    # (bar indices, values) of a min/max downsampled line, ready to be stored for a later chart
+    keep = minmax_downsample(values, max_points)
+    return keep, np.asarray(values)[keep]
+
+
+def build_chart(title, dates, close, chart, equity, max_points=MAX_POINTS):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3],
+                        vertical_spacing=0.03, subplot_titles=(title, 'Equity'))
+
+    keep = minmax_downsample(close, max_points)
+    fig.add_trace(go.Scattergl(x=dates[keep], y=close[keep], name='Close', line=dict(width=1)), row=1, col=1)
+
+    for name, (bars, values) in chart['overlays'].items():
+        fig.add_trace(go.Scattergl(x=dates[bars], y=values, name=name, line=dict(width=1)), row=1, col=1)
+
+    for is_buy, symbol, color, label in ((True, 'triangle-up', 'green', 'Buy'), (False, 'triangle-down', 'red', 'Sell')):
+        sel = chart['marker_is_buy'] == is_buy
+        fig.add_trace(go.Scattergl(x=dates[chart['marker_bars'][sel]], y=chart['marker_prices'][sel], name=label,
+                                   mode='markers', marker=dict(symbol=symbol, color=color, size=9)), row=1, col=1)
+
+    bars, values = equity
+    fig.add_trace(go.Scattergl(x=dates[bars], y=values, name='Equity', line=dict(width=1)), row=2, col=1)
+
+    fig.update_layout(height=700, hovermode='x unified', margin=dict(t=40, b=20))
+    return fig
@@ -0,0 +1,158 @@
+import array
+
+import backtrader as bt
+import numpy as np
+
+MA_KINDS = ('ema', 'sma', 'hma', 'tema')
+
+
+def _first_valid(x):
+    # Index of the first non-NaN value of every row
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _cumsum0(x):
+    # Row-wise cumulative sum with a leading zero column, NaNs counted as 0
+    out = np.zeros((x.shape[0], x.shape[1] + 1))
+    np.cumsum(np.nan_to_num(x), axis=1, out=out[:, 1:])
+    return out
+
+
+def _window_mask(x, periods):
+    # True where a row has at least `period` valid values behind it
+    ready = _first_valid(x) + periods - 1
+    return np.arange(x.shape[1]) >= ready[:, None]
+
+
+def sma_2d(x, periods):
+    x = np.atleast_2d(x)
+    periods = np.asarray(periods, dtype=np.int64)
+    cs = _cumsum0(x)
+    t = np.arange(1, x.shape[1] + 1)
+    lo = np.clip(t - periods[:, None], 0, None)
+    rows = np.arange(x.shape[0])[:, None]
+    out = (cs[:, 1:] - cs[rows, lo]) / periods[:, None]
+    return np.where(_window_mask(x, periods), out, np.nan)
+
+
+def wma_2d(x, periods):
+    # Linearly weighted MA as a weighted sum of `period` shifted views, weight 1 for the oldest
+    # value up to `period` for the newest. Unlike a prefix sum weighted by the bar index, the
+    # rounding error does not grow with the length of the series.
+    x = np.atleast_2d(x)
+    periods = np.asarray(periods, dtype=np.int64)
+    n = x.shape[1]
+    values = np.nan_to_num(x)
+    out = np.full(x.shape, np.nan)
+    for period in np.unique(periods):
+        if period > n:
+            continue
+        rows = periods == period
+        block = values[rows]
+        weighted = np.zeros((block.shape[0], n - period + 1))
+        for j in range(period):
+            weighted += (j + 1) * block[:, j:n - period + 1 + j]
+        out[rows, period - 1:] = weighted / (period * (period + 1) / 2.0)
+    return np.where(_window_mask(x, periods), out, np.nan)
+
+
+def ema_2d(x, periods, alpha=None):
+    # EMA seeded with the SMA of the first `period` values, as backtrader does. `alpha`
+    # defaults to 2 / (period + 1); pass 1 / period for Wilder's smoothing (as used by RSI).
+    # The recurrence y[t] = a[t] * y[t-1] + b[t] is solved for all rows at once with a
+    # log-step prefix scan, so the Python loop runs log2(bars) times instead of once per bar.
+    x = np.atleast_2d(x)
+    periods = np.asarray(periods, dtype=np.int64)
+    n = x.shape[1]
+    alpha = (2.0 / (periods + 1.0) if alpha is None else np.broadcast_to(alpha, periods.shape))[:, None]
+    seed_at = _first_valid(x) + periods - 1
+    t = np.arange(n)
+    after = t > seed_at[:, None]
+    seed = t == seed_at[:, None]
+
+    a = np.where(after, 1.0 - alpha, 0.0)
+    b = np.where(after, alpha * np.nan_to_num(x), 0.0)
+    b = np.where(seed, np.nan_to_num(sma_2d(x, periods)), b)
+
+    shift = 1
+    while shift < n:
+        b[:, shift:] = b[:, shift:] + a[:, shift:] * b[:, :-shift]
+        a[:, shift:] = a[:, shift:] * a[:, :-shift]
+        shift *= 2
+    return np.where(t >= seed_at[:, None], b, np.nan)
+
+
+def hma_2d(x, periods):
+    periods = np.asarray(periods, dtype=np.int64)
+    half = wma_2d(x, periods // 2)
+    full = wma_2d(x, periods)
+    return wma_2d(2.0 * half - full, np.sqrt(periods).astype(np.int64))
+
+
+def tema_2d(x, periods):
+    e1 = ema_2d(x, periods)
+    e2 = ema_2d(e1, periods)
+    e3 = ema_2d(e2, periods)
+    return 3.0 * e1 - 3.0 * e2 + e3
+
+
+def ribbon_minperiod(periods, kind='ema'):
+    longest = max(periods)
+    if kind == 'hma':
+        return longest + int(np.sqrt(longest)) - 1
+    if kind == 'tema':
+        return 3 * longest - 2
+    return longest
+
+
+def ma_ribbon(values, periods, kind='ema'):
+    # K moving averages of one series as a (K x bars) array. `values` may also be a
+    # (paths x bars) array, giving (paths x K x bars) in the same single computation.
+    if kind not in MA_KINDS:
+        raise ValueError(f"Unknown moving average kind '{kind}', expected one of {MA_KINDS}")
+    values = np.asarray(values, dtype=np.float64)
+    lead, n, k = values.shape[:-1], values.shape[-1], len(periods)
+    x = np.broadcast_to(values[..., None, :], lead + (k, n)).reshape(-1, n)
+    rows = np.tile(np.asarray(periods, dtype=np.int64), x.shape[0] // k)
+    func = {'ema': ema_2d, 'sma': sma_2d, 'hma': hma_2d, 'tema': tema_2d}[kind]
+    return func(x, rows).reshape(lead + (k, n))
+
+
+def ribbon_order(ribbon):
+    # Bullish when every shorter MA is above the next longer one, bearish when every one is below
+    step = ribbon[..., :-1, :] - ribbon[..., 1:, :]
+    return (step > 0).all(axis=-2), (step < 0).all(axis=-2)
+
+
+class MovingAverageRibbon(bt.Indicator):
+    # Drop-in line source for backtrader: the whole ribbon is computed in one array pass
+    # over the (preloaded) source instead of as K separate indicators
+    lines = ('shortest', 'longest', 'bullish', 'bearish')
+    params = (('periods', (3, 5, 8, 10, 12, 15)), ('kind', 'ema'))
+    # The averages belong on the price chart; the 0/1 ordering flags do not
+    plotinfo = dict(subplot=False)
+    plotlines = dict(bullish=dict(_plotskip=True), bearish=dict(_plotskip=True))
+
+    def __init__(self):
+        self.addminperiod(ribbon_minperiod(self.p.periods, self.p.kind))
+        self.ribbon = None
+        self._values = None
+
+    def _compute(self):
+        self.ribbon = ma_ribbon(np.asarray(self.data.array, dtype=np.float64), self.p.periods, self.p.kind)
+        bullish, bearish = ribbon_order(self.ribbon)
+        self._values = np.vstack([self.ribbon[0], self.ribbon[-1], bullish, bearish])
+
+    def next(self):
+        i = len(self) - 1
+        # A preloaded source is computed once; a live source is recomputed as it grows
+        if self._values is None or i >= self._values.shape[1]:
+            self._compute()
+        for line, value in zip(self.lines, self._values[:, i]):
+            line[0] = value
+
+    def once(self, start, end):
+        self._compute()
+        for line, values in zip(self.lines, self._values):
+            line.array[start:end] = array.array('d', values[start:end])
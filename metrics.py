@@ -0,0 +1,97 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+class EquityCurve(bt.Analyzer):
+    # Records broker value, market exposure and closed trade PnL per bar.
+    # Kept deliberately minimal so it adds next to nothing to a Cerebro run.
+    def start(self):
+        self.values = []
+        self.exposure = []
+        self.pnl = []
+
+    def next(self):
+        self.values.append(self.strategy.broker.getvalue())
+        self.exposure.append(self.strategy.position.size != 0)
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self.pnl.append(trade.pnlcomm)
+
+    def get_analysis(self):
+        return {
+            'equity': np.asarray(self.values, dtype=np.float64),
+            'exposure': np.asarray(self.exposure, dtype=bool),
+            'pnl': np.asarray(self.pnl, dtype=np.float64),
+        }
+
+
+def pad_runs(arrays, fill=np.nan, dtype=np.float64):
+    # Stack ragged 1-D arrays into a (runs x max_len) matrix, padding the tail with `fill`
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    width = lengths.max() if len(lengths) else 0
+    out = np.full((len(arrays), width), fill, dtype=dtype)
+    mask = np.arange(width) < lengths[:, None]
+    if mask.any():
+        out[mask] = np.concatenate(arrays)
+    return out, lengths
+
+
+def compute_metrics(curves, years):
+    # `curves` is a list of EquityCurve analyses, `years` the calendar length of each run.
+    # All metrics are computed at once over the padded (runs x bars) matrices.
+    n_runs = len(curves)
+    equity, lengths = pad_runs([c['equity'] for c in curves])
+    exposure, _ = pad_runs([c['exposure'] for c in curves], fill=False, dtype=bool)
+    years = np.asarray(years, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[:, 1:] / equity[:, :-1] - 1.0
+        mean_ret = np.nanmean(returns, axis=1)
+        std_ret = np.nanstd(returns, axis=1, ddof=1)
+        downside = np.sqrt(np.nanmean(np.minimum(returns, 0.0) ** 2, axis=1))
+
+        first = equity[:, 0]
+        last = equity[np.arange(n_runs), np.maximum(lengths - 1, 0)]
+        cagr = np.where(years > 0, (last / first) ** (1.0 / years) - 1.0, np.nan)
+        volatility = std_ret * np.sqrt(TRADING_DAYS)
+        sharpe = mean_ret / std_ret * np.sqrt(TRADING_DAYS)
+        sortino = mean_ret / downside * np.sqrt(TRADING_DAYS)
+
+        peak = np.fmax.accumulate(equity, axis=1)
+        drawdown = equity / peak - 1.0
+        max_drawdown = np.nanmin(drawdown, axis=1)
+
+        # Longest underwater stretch: bars since the most recent bar at a peak
+        bars = np.arange(equity.shape[1])
+        underwater = drawdown < 0
+        last_peak = np.maximum.accumulate(np.where(underwater, 0, bars), axis=1)
+        max_dd_duration = np.where(underwater, bars - last_peak, 0).max(axis=1, initial=0)
+
+        exposure_time = exposure.sum(axis=1) / lengths
+
+    run_ids = np.repeat(np.arange(n_runs), [len(c['pnl']) for c in curves])
+    pnl = np.concatenate([c['pnl'] for c in curves]) if n_runs else np.empty(0)
+    n_trades = np.bincount(run_ids, minlength=n_runs)
+    wins = np.bincount(run_ids, weights=pnl > 0, minlength=n_runs)
+    gross_profit = np.bincount(run_ids, weights=np.clip(pnl, 0, None), minlength=n_runs)
+    gross_loss = np.bincount(run_ids, weights=np.clip(-pnl, 0, None), minlength=n_runs)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(n_trades > 0, wins / n_trades, np.nan)
+        profit_factor = np.where(n_trades > 0, gross_profit / gross_loss, np.nan)
+
+    return pd.DataFrame({
+        'CAGR (%)': np.round(cagr * 100, 2),
+        'Volatility (%)': np.round(volatility * 100, 2),
+        'Sharpe': np.round(sharpe, 2),
+        'Sortino': np.round(sortino, 2),
+        'Max Drawdown (%)': np.round(max_drawdown * 100, 2),
+        'Max DD Duration (bars)': max_dd_duration,
+        'Exposure (%)': np.round(exposure_time * 100, 2),
+        'Win Rate (%)': np.round(win_rate * 100, 2),
+        'Profit Factor': np.round(profit_factor, 2),
+    })
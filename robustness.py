@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+
+from Strategies.buy_and_hold import BuyAndHold
+from indicators import ema_2d, hma_2d, ma_ribbon, ribbon_order, sma_2d, tema_2d
+
+MC_METHODS = ('bootstrap', 'gbm')
+BLOCK_SIZE = 20
+# Paths are evaluated in chunks of this many to bound memory on long histories
+PATH_CHUNK = 250
+
+
+def bootstrap_paths(close, n_paths, block=BLOCK_SIZE, rng=None):
+    # Moving-block bootstrap of log returns, so short-range autocorrelation and
+    # volatility clusters survive the resampling. Returns (paths x bars) prices.
+    rng = rng or np.random.default_rng()
+    log_returns = np.diff(np.log(close))
+    n = len(log_returns)
+    block = min(block, n)
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :n]
+    return _prices(close[0], log_returns[idx])
+
+
+def gbm_paths(close, n_paths, rng=None):
+    # Geometric Brownian motion with drift and volatility fitted to the history
+    rng = rng or np.random.default_rng()
+    log_returns = np.diff(np.log(close))
+    draws = rng.normal(log_returns.mean(), log_returns.std(ddof=1), size=(n_paths, len(log_returns)))
+    return _prices(close[0], draws)
+
+
+def _prices(first, log_returns):
+    paths = np.empty((log_returns.shape[0], log_returns.shape[1] + 1))
+    paths[:, 0] = 0.0
+    np.cumsum(log_returns, axis=1, out=paths[:, 1:])
+    return first * np.exp(paths)
+
+
+def _cross_up(fast, slow):
+    prev_fast, prev_slow = np.roll(fast, 1, axis=-1), np.roll(slow, 1, axis=-1)
+    up = (fast > slow) & (prev_fast <= prev_slow)
+    up[..., 0] = False
+    return up
+
+
+def _cross_down(fast, slow):
+    return _cross_up(slow, fast)
+
+
+def _shift(x, periods):
+    out = np.full_like(x, np.nan)
+    out[:, periods:] = x[:, :-periods]
+    return out
+
+
+def _periods(x, period):
+    # sma_2d & co. take one period per row; use the same one for every path
+    return np.full(x.shape[0], period)
+
+
+# Vectorized entry/exit rules mirroring the close-only backtrader strategies. Each takes a
+# (paths x bars) close matrix and the strategy's params, and returns boolean (entry, exit)
+# matrices, so the simulation follows whatever the strategy class is configured with.
+def _ma_crossover(c, p):
+    fast, slow = sma_2d(c, _periods(c, p.fast)), sma_2d(c, _periods(c, p.slow))
+    return _cross_up(fast, slow), _cross_down(fast, slow)
+
+
+def _ema_crossover(c, p):
+    fast, slow = ema_2d(c, _periods(c, p.fast)), ema_2d(c, _periods(c, p.slow))
+    return _cross_up(fast, slow), _cross_down(fast, slow)
+
+
+def _triple_ma(c, p):
+    fast, medium, slow = (sma_2d(c, _periods(c, period)) for period in (p.fast, p.medium, p.slow))
+    return (fast > medium) & (medium > slow), (fast < medium) & (medium < slow)
+
+
+def _hma(c, p):
+    hma = hma_2d(c, _periods(c, p.period))
+    return c > hma, c < hma
+
+
+def _tema(c, p):
+    tema = tema_2d(c, _periods(c, p.period))
+    return c > tema, c < tema
+
+
+def _macd(c, p):
+    macd = ema_2d(c, _periods(c, p.fast)) - ema_2d(c, _periods(c, p.slow))
+    signal = ema_2d(macd, _periods(c, p.signal))
+    return macd > signal, macd < signal
+
+
+def _momentum(c, p):
+    momentum = c - _shift(c, p.period)
+    return momentum > 0, momentum < 0
+
+
+def _roc(c, p):
+    roc = c / _shift(c, p.period) - 1.0
+    return roc > 0, roc < 0
+
+
+def _rsi(c, p):
+    diff = np.diff(c, axis=1, prepend=np.nan)
+    periods = _periods(c, p.period)
+    up = ema_2d(np.where(np.isnan(diff), np.nan, np.maximum(diff, 0.0)), periods, alpha=1.0 / p.period)
+    down = ema_2d(np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0.0)), periods, alpha=1.0 / p.period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + up / down)
+    return rsi < p.oversold, rsi > p.overbought
+
+
+def _bollinger(c, p):
+    periods = _periods(c, p.period)
+    mid = sma_2d(c, periods)
+    std = np.sqrt(np.maximum(sma_2d(c * c, periods) - mid * mid, 0.0))
+    return c < mid - p.devfactor * std, c > mid + p.devfactor * std
+
+
+def _guppy(c, p):
+    fast, slow = ma_ribbon(c, p.fast_periods), ma_ribbon(c, p.slow_periods)
+    fast_bullish, fast_bearish = ribbon_order(fast)
+    slow_bullish, slow_bearish = ribbon_order(slow)
+    return (fast_bullish & slow_bullish & _cross_up(fast[:, 0], fast[:, -1]),
+            fast_bearish & slow_bearish & _cross_down(fast[:, 0], fast[:, -1]))
+
+
+VECTOR_RULES = {
+    'MovingAverageCrossover': _ma_crossover,
+    'EMAcrossoverStrategy': _ema_crossover,
+    'TripleMovingAverageCrossover': _triple_ma,
+    'HMAStrategy': _hma,
+    'TMAStrategy': _tema,
+    'MACDStrategy': _macd,
+    'MomentumStrategy': _momentum,
+    'ROCStrategy': _roc,
+    'RSIStrategy': _rsi,
+    'BollingerBandsStrategy': _bollinger,
+    'GuppyMultipleMovingAverageStrategy': _guppy,
+}
+
+
+def _positions(entry, exit, start):
+    # Long/flat state after each bar: the last entry or exit event wins; nothing before `start`
+    events = np.where(entry, 1.0, np.where(exit, 0.0, np.nan))
+    events[:, :start] = np.nan
+    t = np.arange(events.shape[1])
+    last = np.maximum.accumulate(np.where(np.isnan(events), 0, t), axis=1)
+    return np.nan_to_num(events[np.arange(events.shape[0])[:, None], last])
+
+
+def _simulate_roi(paths, state, shares, start_cash, commission):
+    # Orders placed at the close of bar t are filled at bar t + 1, as with backtrader market
+    # orders. There is no synthetic open, so fills use the close of that bar.
+    held = np.zeros_like(state)
+    held[:, 1:] = state[:, :-1] * shares
+    pnl = (held[:, :-1] * np.diff(paths, axis=1)).sum(axis=1)
+    costs = (commission * paths * np.abs(np.diff(held, axis=1, prepend=0.0))).sum(axis=1)
+    return (pnl - costs) / start_cash
+
+
+def robustness(close, output_start, strategies, start_cash=10000.0, commission=0.001,
+               n_paths=1000, method='bootstrap', seed=0):
+    # ROI of each strategy minus that of Buy and Hold on N synthetic paths of one ticker,
+    # summarized per strategy. `output_start` is the first bar that counts (earlier bars are
+    # warm-up history). `strategies` maps names to strategy classes, whose params drive the
+    # rules. Strategies trade one share, Buy and Hold goes all in, as in backtrader.
+    if method not in MC_METHODS:
+        raise ValueError(f"Unknown Monte Carlo method '{method}', expected one of {MC_METHODS}")
+    close = np.asarray(close, dtype=np.float64).ravel()
+    rng = np.random.default_rng(seed)
+    generate = bootstrap_paths if method == 'bootstrap' else gbm_paths
+    rules = {name: VECTOR_RULES[name] for name in strategies if name in VECTOR_RULES}
+
+    corrected = {name: [] for name in rules}
+    for chunk in range(0, n_paths, PATH_CHUNK):
+        paths = generate(close, min(PATH_CHUNK, n_paths - chunk), rng=rng)
+        # Buy and Hold: all in at the first output bar
+        bh_state = np.zeros_like(paths)
+        bh_state[:, output_start:] = 1.0
+        bh_shares = np.floor(start_cash / paths[:, output_start])[:, None]
+        bh_roi = _simulate_roi(paths, bh_state, bh_shares, start_cash, commission)
+        for name, rule in rules.items():
+            entry, exit = rule(paths, strategies[name].params)
+            roi = _simulate_roi(paths, _positions(entry, exit, output_start), 1.0, start_cash, commission)
+            corrected[name].append((roi - bh_roi) * 100)
+
+    rows = {}
+    for name, strategy_class in strategies.items():
+        if issubclass(strategy_class, BuyAndHold):
+            # Corrected for itself, Buy and Hold is 0 on every path
+            rows[name] = [0.0] * 4
+            continue
+        if name not in rules:
+            rows[name] = [np.nan] * 4
+            continue
+        values = np.concatenate(corrected[name])
+        low, high = np.percentile(values, [5, 95])
+        rows[name] = [values.mean(), low, high, (values > 0).mean() * 100]
+    return pd.DataFrame.from_dict(rows, orient='index', columns=[
+        'MC Corrected Mean (%)', 'MC Corrected 5% (%)', 'MC Corrected 95% (%)', 'MC P(beat B&H) (%)',
+    ]).round(2)
@@ -0,0 +1,163 @@
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque, namedtuple
+from multiprocessing.connection import wait
+
+RUNTIME_HISTORY_PATH = './runtime_history.json'
+DEFAULT_SECONDS_PER_BAR = 0.0005
+# Jobs predicted to be cheaper than this are grouped so one dispatch covers several of them
+MIN_BATCH_SECONDS = 0.5
+JOB_TIMEOUT = 120.0
+JOB_MEMORY_MB = 2048
+POLL_SECONDS = 0.2
+
+# `cost_name` is the key used by the runtime model, `bars` the number of bars the job processes
+Job = namedtuple('Job', ['key', 'cost_name', 'bars', 'func', 'args'])
+
+
+class RuntimeModel:
+    # Least-squares fit of seconds = overhead + rate * bars per strategy, from past runs
+    def __init__(self, path=RUNTIME_HISTORY_PATH):
+        self.path = path
+        self.stats = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.stats = json.load(f)
+
+    def record(self, name, bars, seconds):
+        n, sb, st, sbb, sbt = self.stats.get(name, (0, 0.0, 0.0, 0.0, 0.0))
+        self.stats[name] = (n + 1, sb + bars, st + seconds, sbb + bars * bars, sbt + bars * seconds)
+
+    def predict(self, name, bars):
+        if name not in self.stats:
+            return DEFAULT_SECONDS_PER_BAR * bars
+        n, sb, st, sbb, sbt = self.stats[name]
+        denom = n * sbb - sb * sb
+        if n < 2 or denom <= 0:
+            return st / max(sb, 1) * bars
+        rate = (n * sbt - sb * st) / denom
+        overhead = (st - rate * sb) / n
+        return max(overhead + rate * bars, 0.0)
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.stats, f)
+
+
+def plan_batches(jobs, model, min_batch_seconds=MIN_BATCH_SECONDS):
+    # Longest-processing-time-first: expensive jobs are dispatched alone and first,
+    # cheap ones are packed together and fill in the tail
+    costed = sorted(((model.predict(job.cost_name, job.bars), job) for job in jobs),
+                    key=lambda item: item[0], reverse=True)
+    batches = []
+    small, small_cost = [], 0.0
+    for cost, job in costed:
+        if cost >= min_batch_seconds:
+            batches.append((cost, [job]))
+            continue
+        small.append(job)
+        small_cost += cost
+        if small_cost >= min_batch_seconds:
+            batches.append((small_cost, small))
+            small, small_cost = [], 0.0
+    if small:
+        batches.append((small_cost, small))
+    batches.sort(key=lambda item: item[0], reverse=True)
+    return [batch for _, batch in batches]
+
+
+def _worker(batch, conn):
+    for job in batch:
+        start = time.perf_counter()
+        try:
+            conn.send(('done', job.key, job.func(*job.args), time.perf_counter() - start))
+        except Exception as e:
+            conn.send(('error', job.key, f'{type(e).__name__}: {e}', time.perf_counter() - start))
+    conn.close()
+
+
+def _rss_mb(pid):
+    # Resident memory of a process; only available where /proc exists
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def run_jobs(jobs, model, workers=None, timeout=JOB_TIMEOUT, memory_mb=JOB_MEMORY_MB):
+    # Runs jobs over a pool of worker processes and yields (key, status, payload) as each one
+    # finishes. status is 'done' (payload is the result) or 'error', 'timeout', 'memory' or
+    # 'crashed' (payload is a message). A job that runs past `timeout` seconds or grows its
+    # worker by more than `memory_mb` is killed; the rest of its batch is dispatched again.
+    workers = workers or os.cpu_count() or 1
+    pending = deque(plan_batches(jobs, model))
+    running = {}
+
+    def start(batch):
+        parent_conn, child_conn = mp.Pipe(duplex=False)
+        proc = mp.Process(target=_worker, args=(batch, child_conn), daemon=True)
+        proc.start()
+        child_conn.close()
+        running[parent_conn] = {'proc': proc, 'batch': deque(batch), 'deadline': time.monotonic() + timeout,
+                                'baseline': _rss_mb(proc.pid)}
+
+    def stop(conn, status, message):
+        state = running.pop(conn)
+        state['proc'].kill()
+        state['proc'].join()
+        conn.close()
+        job = state['batch'].popleft()
+        if status == 'timeout':
+            # Remember it as at least this slow so it is dispatched first next time
+            model.record(job.cost_name, job.bars, timeout)
+        if state['batch']:
+            pending.appendleft(list(state['batch']))
+        return job.key, status, message
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                start(pending.popleft())
+
+            for conn in wait(list(running), timeout=POLL_SECONDS):
+                state = running[conn]
+                try:
+                    status, key, payload, seconds = conn.recv()
+                except EOFError:
+                    if state['batch']:
+                        # The pipe closes as the worker dies; reap it so its exit code is known
+                        state['proc'].join(timeout=1.0)
+                        yield stop(conn, 'crashed', f"worker exited with code {state['proc'].exitcode}")
+                    else:
+                        running.pop(conn)
+                        state['proc'].join()
+                        conn.close()
+                    continue
+                job = state['batch'].popleft()
+                if status == 'done':
+                    model.record(job.cost_name, job.bars, seconds)
+                state['deadline'] = time.monotonic() + timeout
+                yield key, status, payload
+
+            now = time.monotonic()
+            for conn, state in list(running.items()):
+                if not state['batch']:
+                    continue
+                if now > state['deadline']:
+                    yield stop(conn, 'timeout', f'killed after {timeout:.0f}s')
+                    continue
+                rss, baseline = _rss_mb(state['proc'].pid), state['baseline']
+                if rss is not None and baseline is not None and rss - baseline > memory_mb:
+                    yield stop(conn, 'memory', f'killed above {memory_mb} MB')
+    finally:
+        # The caller may abandon the generator (a Streamlit rerun, an exception in its loop);
+        # don't leave workers running unsupervised
+        for conn, state in running.items():
+            state['proc'].kill()
+            state['proc'].join()
+            conn.close()
+        running.clear()
@@ -0,0 +1,77 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+LOOKBACK = 63
+MOMENTUM_WINDOW = 126
+
+
+def wide_matrix(frames, column):
+    # (dates x tickers) matrix of one OHLCV column, aligned on the union of all dates
+    frames = {ticker: df for ticker, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    dates = pd.DatetimeIndex(np.unique(np.concatenate([df.index.values for df in frames.values()])))
+    out = np.full((len(dates), len(frames)), np.nan)
+    for col, df in enumerate(frames.values()):
+        out[dates.searchsorted(df.index), col] = df[column].to_numpy(dtype=np.float64).ravel()
+    return pd.DataFrame(out, index=dates, columns=list(frames))
+
+
+def _last_valid(values, valid):
+    # Last non-NaN value of every column
+    last_row = len(values) - 1 - valid[::-1].argmax(axis=0)
+    return values[last_row, np.arange(values.shape[1])]
+
+
+def screen_bars(min_history=0, lookback=LOOKBACK, momentum_window=MOMENTUM_WINDOW, **_):
+    # Bars of history the screen looks at, up to and including the screening date; takes the
+    # same keywords as screen_universe
+    return max(min_history, lookback + 1, momentum_window + 1)
+
+
+def screen_universe(close, volume, min_price=0.0, min_traded_value=0.0, min_history=0,
+                    vol_band=(0.0, np.inf), momentum_top=1.0, lookback=LOOKBACK, momentum_window=MOMENTUM_WINDOW):
+    # Vectorized pre-screen over the whole universe. Liquidity (median daily traded value)
+    # and volatility use the last `lookback` bars, momentum the last `momentum_window` bars.
+    # `momentum_top` is the fraction of the otherwise-eligible tickers kept by momentum rank.
+    # The defaults let every ticker with data at the screening date through.
+    c = close.to_numpy(dtype=np.float64)
+    v = volume.reindex_like(close).to_numpy(dtype=np.float64)
+    valid = ~np.isnan(c)
+
+    history = valid.sum(axis=0)
+    last_price = _last_valid(c, valid)
+
+    # Tickers without data in the window (e.g. listed after the screening date) give all-NaN columns
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        traded_value = np.nanmedian(c[-lookback:] * v[-lookback:], axis=0)
+        log_returns = np.diff(np.log(c[-(lookback + 1):]), axis=0)
+        volatility = np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+
+        recent = c[-(momentum_window + 1):]
+        recent_valid = ~np.isnan(recent)
+        first_price = recent[recent_valid.argmax(axis=0), np.arange(c.shape[1])]
+        momentum = last_price / first_price - 1.0
+
+    eligible = ((history > 0)
+                & (history >= min_history)
+                & (last_price >= min_price)
+                & (np.nan_to_num(traded_value) >= min_traded_value))
+    if tuple(vol_band) != (0.0, np.inf):
+        eligible &= (volatility >= vol_band[0]) & (volatility <= vol_band[1])
+    if momentum_top < 1.0 and eligible.any():
+        threshold = np.nanquantile(np.where(eligible, momentum, np.nan), 1.0 - momentum_top)
+        eligible &= momentum >= threshold
+
+    return pd.DataFrame({
+        'History (bars)': history,
+        'Last Price': last_price,
+        'Median Traded Value': traded_value,
+        'Volatility (%)': volatility * 100,
+        'Momentum (%)': momentum * 100,
+        'Pass': eligible,
+    }, index=close.columns)
@@ -1,7 +1,3 @@
-import os
-import importlib
-import inspect
-import backtrader as bt
 import streamlit as st
 import yfinance as yf
 import pandas as pd
@@ -10,43 +6,26 @@ import io
 import time
 import random
 import openpyxl
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import base64
 from Strategies.buy_and_hold import BuyAndHold
+from backtest import load_strategies, run_job
+from metrics import compute_metrics
+from charts import bucketed, build_chart
+from warmup import warmup_bars, timeframe_warmups, fetch_warmup_bars, plan_fetch, plan_window
+from timeframes import resample_ohlcv, higher_window, warmup_steps
+from screener import wide_matrix, screen_bars, screen_universe
+from scheduler import Job, RuntimeModel, run_jobs
+from robustness import MC_METHODS, robustness
 
 # Define folder paths
 TICKERS_CSV_PATH = './Tickers/tickers.csv'
-STRATEGIES_PATH = './Strategies'
+
+# Bars simulated after warm-up when only the current signal is wanted
+SIGNAL_ONLY_BARS = 5
 
 # Read tickers from CSV
 tickers_df = pd.read_csv(TICKERS_CSV_PATH)
 
-def load_strategies():
-    strategies = {}
-    for filename in os.listdir(STRATEGIES_PATH):
-        if filename.endswith('.py') and filename != '__init__.py':
-            module_name = filename[:-3]  # Remove '.py'
-            module = importlib.import_module(f'Strategies.{module_name}')
-            for name, obj in inspect.getmembers(module):
-                if inspect.isclass(obj) and issubclass(obj, bt.Strategy) and obj != bt.Strategy:
-                    strategies[name] = obj
-    return strategies
-
-def run_backtest(data, strategy_class, start_cash=10000.0, commission=0.001):
-    cerebro = bt.Cerebro()
-    cerebro.adddata(data)
-    cerebro.addstrategy(strategy_class)
-    cerebro.broker.setcash(start_cash)
-    cerebro.broker.setcommission(commission=commission)
-    strategies = cerebro.run(runonce=False)
-    final_value = cerebro.broker.getvalue()
-    strategy = strategies[0]
-    trade_count = strategy.order_count if hasattr(strategy, 'order_count') else 0
-    current_signal = strategy.signal if hasattr(strategy, 'signal') else None
-    roi = strategy.roi if hasattr(strategy, 'roi') else ((final_value / start_cash) - 1.0)
-    return final_value, trade_count, current_signal, roi
-
 #Function to compare the strategy to buy and hold
 def calculate_buy_and_hold(data, start_cash=10000.0):
     initial_price = data['Close'].iloc[0]
@@ -82,44 +61,149 @@ commission = st.number_input('Commission (fraction)', min_value=0.0, max_value=0
 # Date range selection
 end_date = st.date_input('End Date', value=datetime.now() + timedelta(days=1))
 start_date = st.date_input('Start Date', value=end_date - timedelta(days=365))
+signal_only = st.checkbox('Signal-only refresh (simulate only the latest bars)', value=False)
 
-# Load all strategies
-all_strategies = load_strategies()
-
-results = []
-all_start_dates = []
-all_end_dates = []
-progress_bar = st.progress(0)
-for index, row in tickers_df.iterrows():
-    ticker = row['Ticker']
-    name = row['Name']
-    
-    # Fetch data with retry
-    df = fetch_data_with_retry(ticker, start_date, end_date)
-    
-    if not df.empty:
-        all_start_dates.append(df.index[0])
-        all_end_dates.append(df.index[-1])
-        data = bt.feeds.PandasData(dataname=df)
-
-        # Calculate init and latest price to give a feeling of stock movement
-        initial_price = df['Close'].iloc[0]
-        final_price = df['Close'].iloc[-1]
-
-        # Run Buy and Hold strategy
-        bh_final_value, bh_trade_count, bh_signal, bh_roi = run_backtest(data, BuyAndHold, start_cash, commission)
-        bh_profit = bh_final_value - start_cash
-        bh_profit_percentage = bh_roi * 100
-        
+# Universe screen, applied before any backtest is run
+with st.expander('Universe screen'):
+    min_price = st.number_input('Minimum price (EUR)', min_value=0.0, value=0.0, step=1.0)
+    min_traded_value = st.number_input('Minimum median daily traded value (EUR)', min_value=0.0, value=0.0, step=100000.0)
+    min_history = st.number_input('Minimum history (bars)', min_value=0, value=0, step=50)
+    vol_low, vol_high = st.slider('Annualized volatility band (%)', min_value=0, max_value=200, value=(0, 200))
+    momentum_top = st.slider('Keep top momentum (%)', min_value=1, max_value=100, value=100)
+screen_params = {
+    'min_price': min_price,
+    'min_traded_value': min_traded_value,
+    'min_history': min_history,
+    # The top of the slider means no upper bound
+    'vol_band': (vol_low / 100, vol_high / 100 if vol_high < 200 else float('inf')),
+    'momentum_top': momentum_top / 100,
+}
+
+# Robustness mode: ROI distribution over synthetic price paths, computed in batched arrays
+robust_mode = st.checkbox('Robustness mode (Monte Carlo ROI distribution)', value=False)
+robustness_params = None
+if robust_mode:
+    mc_paths = st.number_input('Monte Carlo paths', min_value=100, max_value=10000, value=1000, step=100)
+    mc_method = st.selectbox('Path generator', MC_METHODS,
+                             format_func={'bootstrap': 'Block bootstrap of returns', 'gbm': 'GBM fitted to history'}.get)
+    robustness_params = {'n_paths': int(mc_paths), 'method': mc_method}
+
+def run_grid(start_cash, commission, start_date, end_date, signal_only=False, screen_params=None, robustness_params=None):
+    # Load all strategies
+    all_strategies = load_strategies()
+
+    # Every strategy gets exactly the history it needs to warm up before the requested window
+    strategy_warmups = {strat_name: warmup_bars(strategy_class) for strat_name, strategy_class in all_strategies.items()}
+    higher_warmups = {strat_name: timeframe_warmups(strategy_class) for strat_name, strategy_class in all_strategies.items()}
+    fetch_warmup = max((fetch_warmup_bars(strategy_class) for strategy_class in all_strategies.values()), default=0)
+    output_bars = SIGNAL_ONLY_BARS if signal_only else None
+    # The download also has to cover the history the universe screen looks back over
+    fetch_start, fetch_end = plan_fetch(start_date, end_date, max(fetch_warmup, screen_bars(**(screen_params or {}))),
+                                        output_bars)
+
+    # Fetch data with retry, including the warm-up history; downloads are kept across reruns
+    data_cache = st.session_state.setdefault('data_cache', {})
+    frames = {}
+    for ticker in tickers_df['Ticker']:
+        key = (ticker, fetch_start, fetch_end)
+        if key not in data_cache:
+            data_cache[key] = fetch_data_with_retry(ticker, fetch_start, fetch_end)
+        frames[ticker] = data_cache[key]
+
+    # Prune the universe with a cheap cross-sectional screen before the expensive backtests. A
+    # backtest screens on data up to its first output bar so the universe is not chosen with
+    # hindsight; a signal-only refresh screens on the latest data.
+    close, volume = wide_matrix(frames, 'Close'), wide_matrix(frames, 'Volume')
+    if not signal_only:
+        screen_end = int(close.index.searchsorted(pd.Timestamp(start_date))) + 1
+        close, volume = close.iloc[:screen_end], volume.iloc[:screen_end]
+    screen = screen_universe(close, volume, **(screen_params or {}))
+    survivors = tickers_df[tickers_df['Ticker'].isin(screen.index[screen['Pass']])].reset_index(drop=True)
+    st.write(f"{len(survivors)} of {len(tickers_df)} tickers passed the universe screen")
+
+    # One job per (ticker, strategy) plus the Buy and Hold benchmark per ticker
+    jobs = []
+    windows = {}
+    for ticker in survivors['Ticker']:
+        df = frames[ticker]
+        window = df.iloc[plan_window(df.index, start_date, 0, output_bars)[1]:]
+        if window.empty:
+            continue
+        windows[ticker] = window
+        jobs.append(Job((ticker, None), 'BuyAndHold', len(window), run_job, (window, BuyAndHold, start_cash, commission)))
+        short_warmup = []
         for strat_name, strategy_class in all_strategies.items():
-            try:
-                final_value, trade_count, current_signal, roi = run_backtest(data, strategy_class, start_cash, commission)
+            first, output_start, stop = plan_window(df.index, start_date, strategy_warmups[strat_name], output_bars)
+            if output_start - first < strategy_warmups[strat_name]:
+                short_warmup.append(strat_name)
+            feed = df.iloc[first:stop]
+            # Higher timeframes are resampled once per ticker and shared by every strategy asking for them
+            higher = {}
+            for timeframe, periods in higher_warmups[strat_name].items():
+                key = (ticker, fetch_start, fetch_end, timeframe)
+                if key not in data_cache:
+                    data_cache[key] = resample_ohlcv(df, timeframe)
+                higher[timeframe] = higher_window(data_cache[key], df.index[output_start], df.index[stop - 1], periods)
+                if higher[timeframe].index.searchsorted(df.index[output_start]) < periods and strat_name not in short_warmup:
+                    short_warmup.append(strat_name)
+            warmup = warmup_steps([feed, *higher.values()], df.index[output_start])
+            jobs.append(Job((ticker, strat_name), strat_name, stop - first, run_job,
+                            (feed, strategy_class, start_cash, commission, warmup, higher)))
+        if short_warmup:
+            st.warning(f"Not enough history for {ticker} to warm up {', '.join(short_warmup)}: "
+                       f"their first decisions fall after the start date")
+
+    # Longest jobs first over all cores, with runaway jobs killed and reported
+    runtime_model = RuntimeModel()
+    outcomes = {}
+    progress_bar = st.progress(0)
+    for done, (key, status, payload) in enumerate(run_jobs(jobs, runtime_model), 1):
+        outcomes[key] = (status, payload)
+        progress_bar.progress(done / len(jobs))
+    runtime_model.save()
+
+    results = []
+    curves = []
+    run_years = []
+    charts = {}
+    prices = {}
+    all_start_dates = []
+    all_end_dates = []
+    for index, row in survivors.iterrows():
+        ticker = row['Ticker']
+        name = row['Name']
+
+        if ticker in windows:
+            window = windows[ticker]
+            all_start_dates.append(window.index[0])
+            all_end_dates.append(window.index[-1])
+            prices[ticker] = (window.index.values, window['Close'].to_numpy(dtype=float).ravel())
+
+            # Calculate init and latest price to give a feeling of stock movement
+            initial_price = window['Close'].iloc[0]
+            final_price = window['Close'].iloc[-1]
+
+            # Buy and Hold benchmark
+            status, payload = outcomes[(ticker, None)]
+            if status != 'done':
+                st.error(f"Error processing {ticker} with Buy and Hold ({status}): {payload}")
+                continue
+            bh_final_value, bh_trade_count, bh_signal, bh_roi, _, _ = payload
+            bh_profit = bh_final_value - start_cash
+            bh_profit_percentage = bh_roi * 100
+
+            for strat_name in all_strategies:
+                status, payload = outcomes[(ticker, strat_name)]
+                if status != 'done':
+                    st.error(f"Error processing {ticker} with strategy {strat_name} ({status}): {payload}")
+                    continue
+                final_value, trade_count, current_signal, roi, curve, chart = payload
                 profit = final_value - start_cash
                 profit_percentage = roi * 100
-                
+
                 # Calculate the difference from Buy and Hold
                 profit_corrected = profit_percentage - bh_profit_percentage
-                
+
                 results.append({
                     'Ticker': ticker,
                     'Name': name,
@@ -130,20 +214,55 @@ for index, row in tickers_df.iterrows():
                     'Profit (EUR)': round(profit, 2),
                     'Profit (%)': round(profit_percentage, 2),
                     'Profit_corrected for B&H (%)': round(profit_corrected, 2),
-                    'Start Date': df.index[0].strftime('%Y-%m-%d'),
-                    'End Date': df.index[-1].strftime('%Y-%m-%d'),
+                    'Start Date': window.index[0].strftime('%Y-%m-%d'),
+                    'End Date': window.index[-1].strftime('%Y-%m-%d'),
                     'Trades': trade_count,
                     'Buy/Sell Signal': current_signal
                 })
-            except Exception as e:
-                st.error(f"Error processing {ticker} with strategy {strat_name}: {str(e)}")
-    
-    # Update progress bar
-    progress_bar.progress((index + 1) / len(tickers_df))
+                curves.append(curve)
+                run_years.append((window.index[-1] - window.index[0]).days / 365.25)
+                # Only a bucketed equity curve is kept for the chart; the metrics use the full one
+                charts[(ticker, strat_name)] = (chart, bucketed(curve['equity']))
+
+    results_df = pd.DataFrame(results)
+    if curves:
+        # Performance analytics for all runs in one batched pass
+        results_df = pd.concat([results_df, compute_metrics(curves, run_years)], axis=1)
+
+    if robustness_params and not results_df.empty:
+        # All strategies of a ticker are evaluated on the same N paths at once
+        mc = {}
+        for ticker in results_df['Ticker'].unique():
+            df = frames[ticker]
+            output_start = plan_window(df.index, start_date, 0, output_bars)[1]
+            mc[ticker] = robustness(df['Close'], output_start, all_strategies, start_cash, commission, **robustness_params)
+        mc_df = pd.DataFrame([mc[ticker].loc[strat_name] for ticker, strat_name in zip(results_df['Ticker'], results_df['Strategy'])])
+        # Show the distribution next to the historical B&H-corrected profit
+        columns = list(results_df.columns)
+        at = columns.index('Profit_corrected for B&H (%)') + 1
+        results_df = pd.concat([results_df, mc_df.reset_index(drop=True)], axis=1)
+        results_df = results_df[columns[:at] + list(mc_df.columns) + columns[at:]]
+    return results_df, charts, prices, all_start_dates, all_end_dates
+
+# Only re-run the grid when the inputs change; selecting a row must not trigger a new backtest
+run_key = (start_cash, commission, start_date, end_date, signal_only, tuple(screen_params.items()),
+           tuple(robustness_params.items()) if robustness_params else None)
+if st.session_state.get('run_key') != run_key:
+    st.session_state['grid'] = run_grid(start_cash, commission, start_date, end_date, signal_only, screen_params,
+                                        robustness_params)
+    st.session_state['run_key'] = run_key
+results_df, charts, prices, all_start_dates, all_end_dates = st.session_state['grid']
 
 # Display results
-results_df = pd.DataFrame(results)
-st.dataframe(results_df, use_container_width=True)
+event = st.dataframe(results_df, use_container_width=True, on_select='rerun', selection_mode='single-row')
+
+# Chart for the selected (ticker, strategy), built only on demand
+if event.selection.rows:
+    selected = results_df.iloc[event.selection.rows[0]]
+    chart, equity = charts[(selected['Ticker'], selected['Strategy'])]
+    dates, close = prices[selected['Ticker']]
+    fig = build_chart(f"{selected['Ticker']} - {selected['Strategy']}", dates, close, chart, equity)
+    st.plotly_chart(fig, use_container_width=True)
 
 # Download buttons
 if not results_df.empty:
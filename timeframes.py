@@ -0,0 +1,58 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+# Higher timeframes a strategy can ask for through a `timeframes` class attribute, with the
+# pandas period used to group daily bars, the backtrader timeframe and the approximate
+# number of daily bars per period (used to size the download)
+TIMEFRAMES = {
+    'weekly': ('W-FRI', bt.TimeFrame.Weeks, 5),
+    'monthly': ('M', bt.TimeFrame.Months, 21),
+}
+
+
+def strategy_timeframes(strategy_class):
+    timeframes = tuple(getattr(strategy_class, 'timeframes', ()))
+    for timeframe in timeframes:
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"{strategy_class.__name__} asks for unknown timeframe '{timeframe}', "
+                             f"expected one of {tuple(TIMEFRAMES)}")
+    return timeframes
+
+
+def resample_ohlcv(df, timeframe):
+    # One bar per period, stamped with the date of the period's last daily bar. Backtrader then
+    # delivers it together with that daily bar, i.e. only once the period has closed, so a
+    # strategy never sees a higher-timeframe bar before all of its daily bars are known.
+    # Periods cut off by the start or end of `df` are dropped: a period counts as complete only
+    # if the business days just outside the data fall in a neighbouring period.
+    period = TIMEFRAMES[timeframe][0]
+    periods = df.index.to_period(period)
+    daily = pd.DataFrame({c: df[c].to_numpy(dtype=np.float64).ravel() for c in ('Open', 'High', 'Low', 'Close', 'Volume')},
+                         index=df.index)
+    daily['Date'] = df.index
+    bars = daily.groupby(periods).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum', 'Date': 'last'})
+    if len(bars) and (df.index[0] - pd.offsets.BDay(1)).to_period(period) == periods[0]:
+        bars = bars.iloc[1:]
+    if len(bars) and (df.index[-1] + pd.offsets.BDay(1)).to_period(period) == periods[-1]:
+        bars = bars.iloc[:-1]
+    return bars.set_index('Date').rename_axis(None)
+
+
+def higher_window(bars, output_date, stop_date, warmup):
+    # Higher-timeframe bars for one run: `warmup` periods completed before `output_date`,
+    # then every period that closes up to `stop_date`
+    output_start = int(bars.index.searchsorted(output_date))
+    stop = int(bars.index.searchsorted(stop_date, side='right'))
+    return bars.iloc[max(output_start - warmup, 0):stop]
+
+
+def higher_feed(bars, timeframe):
+    return bt.feeds.PandasData(dataname=bars, name=timeframe, timeframe=TIMEFRAMES[timeframe][1], compression=1)
+
+
+def warmup_steps(frames, output_date):
+    # Backtrader steps over the union of all feeds' dates; count the steps before the output
+    dates = np.unique(np.concatenate([frame.index.values for frame in frames]))
+    return int(np.searchsorted(dates, np.datetime64(output_date)))
@@ -0,0 +1,80 @@
+import math
+
+import backtrader as bt
+import pandas as pd
+
+from timeframes import TIMEFRAMES, higher_feed, strategy_timeframes
+
+# Calendar days per trading bar (252 sessions a year covers exchange holidays), with
+# proportional slack so long warm-ups don't outgrow the margin, plus a fixed few days
+DAYS_PER_BAR = 365.25 / 252
+WARMUP_SLACK = 0.05
+HOLIDAY_MARGIN_DAYS = 10
+
+_minperiods = {}
+
+
+def strategy_minperiods(strategy_class):
+    # Minimum period of every data feed: the daily one first, then one per entry of the
+    # strategy's `timeframes`. A strategy may declare `minperiod` itself (one int for the daily
+    # feed, or one per feed); otherwise backtrader works it out from the indicators created in
+    # __init__, which a run on two-bar stub feeds is enough to trigger
+    timeframes = strategy_timeframes(strategy_class)
+    if hasattr(strategy_class, 'minperiod'):
+        declared = strategy_class.minperiod
+        if isinstance(declared, (tuple, list)):
+            return tuple(int(p) for p in declared)
+        return (int(declared),) + (1,) * len(timeframes)
+    if strategy_class not in _minperiods:
+        stub = pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 0.0},
+                            index=pd.date_range('2000-01-03', periods=2))
+        cerebro = bt.Cerebro(stdstats=False)
+        cerebro.adddata(bt.feeds.PandasData(dataname=stub))
+        for timeframe in timeframes:
+            cerebro.adddata(higher_feed(stub, timeframe))
+        cerebro.addstrategy(strategy_class)
+        strategy = cerebro.run(runonce=False)[0]
+        _minperiods[strategy_class] = tuple(strategy._minperiods)
+    return _minperiods[strategy_class]
+
+
+def warmup_bars(strategy_class):
+    # Daily bars that must precede the first bar on which the strategy's next() runs
+    return strategy_minperiods(strategy_class)[0] - 1
+
+
+def timeframe_warmups(strategy_class):
+    # Completed higher-timeframe bars each resampled feed needs before the first output bar
+    return dict(zip(strategy_timeframes(strategy_class), strategy_minperiods(strategy_class)[1:]))
+
+
+def fetch_warmup_bars(strategy_class):
+    # Daily bars of history to download so that every feed can warm up; a resampled feed needs
+    # its completed periods, the one in progress at the first output bar and a spare one, as
+    # the download generally starts mid-period and that partial period is dropped
+    needed = [warmup_bars(strategy_class)]
+    for timeframe, periods in timeframe_warmups(strategy_class).items():
+        needed.append((periods + 2) * TIMEFRAMES[timeframe][2])
+    return max(needed)
+
+
+def plan_fetch(start_date, end_date, max_warmup, output_bars=None):
+    # Date range to download for a ticker so that every strategy in the set can warm up
+    # before `start_date`, or before the last `output_bars` bars when only those are needed
+    first_output = start_date
+    if output_bars is not None:
+        first_output = max(start_date, end_date - pd.Timedelta(days=math.ceil(output_bars * DAYS_PER_BAR)))
+    lead = math.ceil(max_warmup * DAYS_PER_BAR * (1 + WARMUP_SLACK)) + HOLIDAY_MARGIN_DAYS if max_warmup else 0
+    return first_output - pd.Timedelta(days=lead), end_date
+
+
+def plan_window(index, start_date, warmup, output_bars=None):
+    # Positional slice of `index` to feed one strategy: `warmup` bars of history followed by the
+    # requested output. Returns (first, output_start, stop); output_start - first may be less
+    # than `warmup` when the available history is too short.
+    stop = len(index)
+    output_start = int(index.searchsorted(pd.Timestamp(start_date)))
+    if output_bars is not None:
+        output_start = max(output_start, stop - output_bars)
+    first = max(output_start - warmup, 0)
+    return first, output_start, stop